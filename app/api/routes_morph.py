@@ -1,64 +1,226 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import List
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
 
-from fastapi import APIRouter, File, Form, UploadFile, Depends
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.responses import FileResponse
+from pydantic import ValidationError as PydanticValidationError
+from starlette.concurrency import run_in_threadpool
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException, parse_content_boundary
+from streaming_form_data.targets import BaseTarget, ValueTarget
+from streaming_form_data.validators import MaxSizeValidator
+from streaming_form_data.validators import ValidationError as FieldTooLargeError
 
 from app.core.config import settings
-from app.core.exceptions import ValidationError
+from app.core.exceptions import ProcessingError, ValidationError
 from app.morph.base import MorphMethod
-from app.services.morph_service import MorphService
+from app.services.morph_service import MorphService, create_morph_pool
+from app.services.storage_service import JobPaths, StorageService
 from .schemas import MorphMethodEnum, MorphRequest, MorphResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["morph"])
 
+# Image types are detected from the leading bytes of each upload, not the client's Content-Type
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+_SNIFF_LEN = max(len(sig) for sig, _ in _IMAGE_SIGNATURES)
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png"}
+# Option fields are small integers or enum names; anything longer is rejected while it streams in
+_MAX_OPTION_BYTES = 64
 
-def get_service() -> MorphService:
-    return MorphService()
+_MORPH_FORM_SCHEMA = {
+    "type": "object",
+    "required": ["files"],
+    "properties": {
+        "files": {"type": "array", "items": {"type": "string", "format": "binary"}, "description": "2 or more images"},
+        "frames_per_transition": {"type": "integer", "minimum": 1, "maximum": 1000},
+        "fps": {"type": "integer", "minimum": 1, "maximum": 120},
+        "method": {"type": "string", "enum": [m.value for m in MorphMethodEnum]},
+    },
+}
 
 
-@router.post("/morph", response_class=FileResponse, responses={200: {"content": {"video/mp4": {}}}})
-async def morph_endpoint(
-    files: List[UploadFile] = File(..., description="2 or more images"),
-    frames_per_transition: int = Form(default=settings.default_frames_per_transition, ge=1, le=1000),
-    fps: int = Form(default=settings.default_fps, ge=1, le=120),
-    method: MorphMethodEnum = Form(default=MorphMethodEnum.classical),
-    svc: MorphService = Depends(get_service),
-):
-    # Validate file count
-    if len(files) < 2:
-        raise ValidationError("Upload at least 2 images")
-    if len(files) > settings.max_upload_images:
-        raise ValidationError(f"Too many images. Max: {settings.max_upload_images}")
+def get_service(request: Request) -> MorphService:
+    return request.app.state.morph_service
 
-    # Validate types and sizes; stream into memory while checking
-    data: List[bytes] = []
-    names: List[str] = []
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    for sig, content_type in _IMAGE_SIGNATURES:
+        if head.startswith(sig):
+            return content_type
+    return None
+
+
+class ImageUploadTarget(BaseTarget):
+    """Streams every part of a repeated file field into its own file in the job input dir."""
+
+    def __init__(self, storage: StorageService, job: JobPaths, max_bytes: int, max_files: int) -> None:
+        super().__init__()
+        self.storage = storage
+        self.job = job
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.paths: List[Path] = []
+        self._out: Optional[BinaryIO] = None
+        self._part_path: Optional[Path] = None
+        self._head = b""
+        self._size = 0
+
+    def on_start(self) -> None:
+        if len(self.paths) >= self.max_files:
+            raise ValidationError(f"Too many images. Max: {self.max_files}")
+        self._part_path = self.storage.upload_path(self.job, len(self.paths), ".part")
+        self._out = open(self._part_path, "wb")
+        self._head = b""
+        self._size = 0
+
+    def on_data_received(self, chunk: bytes) -> None:
+        self._size += len(chunk)
+        if self._size > self.max_bytes:
+            raise ValidationError(f"File too large: {self.multipart_filename}")
+        if len(self._head) < _SNIFF_LEN:
+            self._head += chunk[: _SNIFF_LEN - len(self._head)]
+        self._out.write(chunk)
+
+    def on_finish(self) -> None:
+        self.close()
+        content_type = sniff_image_type(self._head)
+        if content_type not in settings.allowed_image_type_set:
+            raise ValidationError(f"Unsupported image type: {self.multipart_filename}")
+        path = self.storage.upload_path(self.job, len(self.paths), _EXTENSIONS[content_type])
+        self._part_path.replace(path)
+        self.paths.append(path)
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+
+def _parse_options(targets: Dict[str, ValueTarget]) -> MorphRequest:
+    defaults = {
+        "frames_per_transition": settings.default_frames_per_transition,
+        "fps": settings.default_fps,
+        "method": MorphMethodEnum.classical,
+    }
+    values = {name: t.value.decode() if t.value else defaults[name] for name, t in targets.items()}
+    try:
+        return MorphRequest(**values)
+    except PydanticValidationError as e:
+        err = e.errors()[0]
+        raise ValidationError(f"Invalid {err['loc'][0]}: {err['msg']}")
+
+
+@router.post(
+    "/morph",
+    response_class=FileResponse,
+    responses={200: {"content": {"video/mp4": {}}}},
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": _MORPH_FORM_SCHEMA}}}},
+)
+async def morph_endpoint(request: Request, svc: MorphService = Depends(get_service)):
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise ValidationError("Expected a multipart/form-data body")
+
+    # Parse the multipart body as it arrives, writing images straight to the job input dir
     max_bytes = settings.max_image_size_mb * 1024 * 1024
-    for f in files:
-        if f.content_type not in settings.allowed_image_types:
-            raise ValidationError(f"Unsupported content-type: {f.content_type}")
-        content = await f.read()
-        if len(content) > max_bytes:
-            raise ValidationError(f"File too large: {f.filename}")
-        data.append(content)
-        names.append(f.filename or "upload.png")
-
-    job = svc.process_job(
-        files_data=data,
-        filenames=names,
-        frames_per_transition=frames_per_transition,
-        fps=fps,
-        method=MorphMethod(method.value),
-    )
+    job = svc.storage.create_job()
+    logger.info("job_created", extra={"job_id": job.job_id})
+    images = ImageUploadTarget(svc.storage, job, max_bytes, settings.max_upload_images)
+    options = {
+        name: ValueTarget(validator=MaxSizeValidator(_MAX_OPTION_BYTES))
+        for name in ("frames_per_transition", "fps", "method")
+    }
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register("files", images)
+        for name, target in options.items():
+            parser.register(name, target)
+        # The parser does not report a body that stops mid-part, so watch for the closing delimiter
+        ender = b"\r\n--" + parse_content_boundary(request.headers) + b"--"
+        tail = b""
+        ended = False
+        async for chunk in request.stream():
+            # The targets open, write and rename files; keep that disk I/O off the event loop
+            await run_in_threadpool(parser.data_received, chunk)
+            if not ended:
+                # The delimiter may straddle two chunks
+                ended = ender in tail + chunk[: len(ender)] or ender in chunk
+                tail = (tail + chunk[-len(ender):])[-len(ender):]
+        if not ended:
+            raise ParseFailedException("Body ended before the closing boundary")
+        # Validate file count
+        if len(images.paths) < 2:
+            raise ValidationError("Upload at least 2 images")
+        opts = _parse_options(options)
+    except ParseFailedException:
+        svc.storage.discard_job(job)
+        raise ValidationError("Malformed multipart body")
+    except FieldTooLargeError:
+        svc.storage.discard_job(job)
+        raise ValidationError("Form field too large")
+    except Exception:
+        svc.storage.discard_job(job)
+        raise
+    finally:
+        images.close()
+
+    pool = request.app.state.morph_pool
+    try:
+        job = await asyncio.get_running_loop().run_in_executor(
+            pool,
+            functools.partial(
+                svc.process_job,
+                job=job,
+                input_paths=images.paths,
+                frames_per_transition=opts.frames_per_transition,
+                fps=opts.fps,
+                method=MorphMethod(opts.method.value),
+            ),
+        )
+    except BrokenProcessPool:
+        # A worker died (crash or OOM kill); the pool is unusable until replaced
+        _replace_pool(request.app, pool)
+        svc.storage.discard_job(job)
+        raise ProcessingError("Morph worker crashed")
+    except NotImplementedError as e:
+        # The method is accepted by the schema but has no engine yet
+        svc.storage.discard_job(job)
+        raise ValidationError(str(e))
+    except Exception:
+        logger.exception("job_failed", extra={"job_id": job.job_id})
+        svc.storage.discard_job(job)
+        raise ProcessingError()
 
+    return _video_response(job)
+
+
+def _replace_pool(app: FastAPI, broken: ProcessPoolExecutor) -> None:
+    # Concurrent requests all see the same broken pool; only the first one swaps it out
+    if app.state.morph_pool is broken:
+        app.state.morph_pool = create_morph_pool()
+        logger.warning("morph_pool_recreated")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _video_response(job: JobPaths) -> FileResponse:
+    # FileResponse streams from disk (zero-copy via pathsend where the server supports it) and
+    # honours Range requests; the stat result fixes Content-Length without a second stat on send.
     return FileResponse(
         path=str(job.output_video),
         media_type="video/mp4",
         filename=f"morph_{job.job_id}.mp4",
+        stat_result=os.stat(job.output_video),
+        headers={"Accept-Ranges": "bytes"},
     )
-
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import os
+from functools import cached_property
 from pathlib import Path
-from typing import List
+from typing import FrozenSet, List
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -34,6 +35,16 @@ class Settings(BaseModel):
     default_frames_per_transition: int = Field(default_factory=lambda: int(os.getenv("DEFAULT_FRAMES_PER_TRANSITION", "30")))
     default_fps: int = Field(default_factory=lambda: int(os.getenv("DEFAULT_FPS", "30")))
 
+    # Morph worker processes; the CPU cores are split evenly between them as frame-render threads
+    morph_workers: int = Field(
+        default_factory=lambda: int(os.getenv("MORPH_WORKERS", str(max(1, (os.cpu_count() or 1) // 4)))),
+        validate_default=True,
+    )
+
+    @cached_property
+    def allowed_image_type_set(self) -> FrozenSet[str]:
+        return frozenset(self.allowed_image_types)
+
     @property
     def input_dir(self) -> Path:
         return self.morph_work_dir / "input"
@@ -53,6 +64,13 @@ class Settings(BaseModel):
             raise ValueError("MAX_UPLOAD_IMAGES must be >= 2")
         return v
 
+    @field_validator("morph_workers")
+    @classmethod
+    def _validate_morph_workers(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError("MORPH_WORKERS must be >= 1")
+        return v
+
     @field_validator("allowed_image_types")
     @classmethod
     def _validate_types(cls, v: List[str]) -> List[str]:
@@ -1,10 +1,36 @@
 from __future__ import annotations
 
-import json
 import logging
 import sys
 from typing import Any, Dict
 
+import orjson
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED_KEYS = frozenset((
+    "name",
+    "msg",
+    "args",
+    "levelname",
+    "levelno",
+    "pathname",
+    "filename",
+    "module",
+    "exc_info",
+    "exc_text",
+    "stack_info",
+    "lineno",
+    "funcName",
+    "created",
+    "msecs",
+    "relativeCreated",
+    "thread",
+    "threadName",
+    "processName",
+    "process",
+    "taskName",
+))
+
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
@@ -18,31 +44,11 @@ class JsonFormatter(logging.Formatter):
         if record.stack_info:
             payload["stack_info"] = self.formatStack(record.stack_info)
         # Include any extra fields
-        for k, v in record.__dict__.items():
-            if k not in (
-                "name",
-                "msg",
-                "args",
-                "levelname",
-                "levelno",
-                "pathname",
-                "filename",
-                "module",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-                "lineno",
-                "funcName",
-                "created",
-                "msecs",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "processName",
-                "process",
-            ):
-                payload[k] = v
-        return json.dumps(payload, ensure_ascii=False)
+        extras = record.__dict__.keys() - _RESERVED_KEYS
+        if extras:
+            # Walk the record dict rather than the set so fields keep their `extra=` order
+            payload.update((k, v) for k, v in record.__dict__.items() if k in extras)
+        return orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
 
 
 def setup_logging(level: int = logging.INFO) -> None:
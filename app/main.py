@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
@@ -13,12 +14,26 @@ from fastapi.templating import Jinja2Templates
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.api.routes_morph import router as morph_router
+from app.services.morph_service import MorphService, create_morph_pool
 
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="pic2video-morph-service", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Morph jobs are CPU-bound; run them in worker processes so the event loop stays responsive
+    # Creating the pool probes for a hardware video encoder, which can take a few seconds
+    app.state.morph_pool = await asyncio.to_thread(create_morph_pool)
+    app.state.morph_service = MorphService()
+    try:
+        yield
+    finally:
+        app.state.morph_pool.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="pic2video-morph-service", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,17 +46,16 @@ app.add_middleware(
 
 @app.middleware("http")
 async def request_logger(request: Request, call_next):
-    start = time.time()
+    # The loop's monotonic clock avoids a wall-clock syscall per request
+    loop = asyncio.get_running_loop()
+    start = loop.time()
     response = await call_next(request)
-    duration = (time.time() - start) * 1000
     logger.info(
-        "http_request",
-        extra={
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "duration_ms": round(duration, 2),
-        },
+        "http_request method=%s path=%s status=%d duration_ms=%.2f",
+        request.method,
+        request.url.path,
+        response.status_code,
+        (loop.time() - start) * 1000,
     )
     return response
 
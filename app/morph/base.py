@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Tuple
+from typing import Iterator
 import numpy as np
 
 
@@ -21,7 +21,7 @@ class MorphEngine(ABC):
         img_a: np.ndarray,
         img_b: np.ndarray,
         frames: int,
-    ) -> List[np.ndarray]:
+    ) -> Iterator[np.ndarray]:
         """Generate intermediate frames between img_a and img_b.
 
         Args:
@@ -29,8 +29,8 @@ class MorphEngine(ABC):
             img_b: Second image (same size as img_a).
             frames: Number of in-between frames (not counting endpoints).
 
-        Returns:
-            A list of `frames` frames (each H x W x 3, uint8).
+        Yields:
+            `frames` frames (each H x W x 3, uint8), produced lazily.
         """
         raise NotImplementedError
 
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Callable, Deque, Iterator, List, Tuple
 
 import cv2
 import numpy as np
 
 from .base import MorphEngine
+from .kernels import fill_remap_maps_parallel, fill_remap_maps_serial, limit_threads
 
 
 @dataclass
@@ -16,36 +22,91 @@ class GridConfig:
 
 
 class ClassicalMorphEngine(MorphEngine):
-    """OpenCV-based image morphing using grid + Delaunay triangulation."""
+    """OpenCV-based image morphing using grid + Delaunay triangulation.
 
-    def __init__(self, grid: GridConfig | None = None):
+    Both images currently share the same grid control points, which makes every
+    triangle warp the identity. Unless `use_warp` is set, the engine therefore skips
+    the triangulation entirely and renders a plain cross-dissolve; the warp path is
+    kept for when real point correspondences are wired in.
+    """
+
+    def __init__(self, grid: GridConfig | None = None, use_warp: bool = False, workers: int | None = None):
         self.grid = grid or GridConfig()
+        self.use_warp = use_warp
+        self.workers = workers or _default_workers or os.cpu_count() or 1
+        # The warp path runs on the GPU when OpenCV is built with CUDA and a device is present
+        self._use_cuda = _cuda_available()
 
     # --- Public API ---
-    def morph_pair(self, img_a: np.ndarray, img_b: np.ndarray, frames: int) -> List[np.ndarray]:
+    def morph_pair(self, img_a: np.ndarray, img_b: np.ndarray, frames: int) -> Iterator[np.ndarray]:
         h, w = img_a.shape[:2]
         if img_b.shape[:2] != (h, w):
             img_b = cv2.resize(img_b, (w, h), interpolation=cv2.INTER_LINEAR)
-
-        pts = self._grid_points(w, h, self.grid.nx, self.grid.ny)
-        tri_indices = self._delaunay(w, h, pts)
-
-        # Precompute per-triangle source points arrays for performance
-        a_pts = np.array(pts, dtype=np.float32)
-        b_pts = np.array(pts, dtype=np.float32)
-
-        frames_list: List[np.ndarray] = []
         # Generate frames evenly spaced in (0,1), excluding endpoints to avoid duplicates
-        for i in range(frames):
-            t = (i + 1) / (frames + 1)
-            interp_pts = (1 - t) * a_pts + t * b_pts
+        ts = (np.arange(1, frames + 1) / (frames + 1)).astype(np.float32)
+        if not self.use_warp:
+            yield from self._render_frames(lambda t: self._cross_dissolve(img_a, img_b, t), ts)
+            return
 
-            warp_a = self._warp_by_triangles(img_a, a_pts, interp_pts, tri_indices)
-            warp_b = self._warp_by_triangles(img_b, b_pts, interp_pts, tri_indices)
-            out = cv2.addWeighted(warp_a, 1.0 - t, warp_b, t, 0.0)
-            frames_list.append(out)
+        # The grid and its triangulation depend only on the image size, so they are cached
+        pts, tri_indices = _grid_and_triangles(w, h, self.grid.nx, self.grid.ny)
+        a_pts = pts
+        b_pts = pts
+
+        # Identical control points mean the warp is the same for every t and both images
+        static_maps = self._remap_tables(w, h, a_pts, a_pts, tri_indices) if np.array_equal(a_pts, b_pts) else None
+
+        # On CUDA the images (and static maps) are uploaded once and stay resident for the whole pair
+        src_a, src_b = self._to_device(img_a), self._to_device(img_b)
+        if static_maps is not None:
+            static_maps = (self._to_device(static_maps[0]), self._to_device(static_maps[1]))
+
+        def render(t: float) -> np.ndarray:
+            if static_maps is not None:
+                maps_a = maps_b = static_maps
+            else:
+                interp_pts = (1 - t) * a_pts + t * b_pts
+                # Already on a pool thread when workers > 1, so use the single-threaded kernel
+                serial = self.workers > 1 and not self._use_cuda
+                maps_a = self._remap_tables(w, h, a_pts, interp_pts, tri_indices, parallel=not serial)
+                maps_b = self._remap_tables(w, h, b_pts, interp_pts, tri_indices, parallel=not serial)
+                maps_a = (self._to_device(maps_a[0]), self._to_device(maps_a[1]))
+                maps_b = (self._to_device(maps_b[0]), self._to_device(maps_b[1]))
+            warp_a = self._warp_by_triangles(src_a, *maps_a)
+            warp_b = self._warp_by_triangles(src_b, *maps_b)
+            if self._use_cuda:
+                return cv2.cuda.addWeighted(warp_a, 1.0 - t, warp_b, t, 0.0).download()  # type: ignore[attr-defined]
+            return cv2.addWeighted(warp_a, 1.0 - t, warp_b, t, 0.0)
+
+        if self._use_cuda:
+            # The device already parallelizes each frame; host threads would only contend for it
+            yield from (render(float(t)) for t in ts)
+        else:
+            yield from self._render_frames(render, ts)
+
+    def _render_frames(self, render: Callable[[float], np.ndarray], ts: np.ndarray) -> Iterator[np.ndarray]:
+        """Yield render(t) for each t in order, computing up to `workers` frames concurrently.
+
+        OpenCV and numpy release the GIL, so threads scale across cores. At most
+        `workers` frames are in flight, which keeps memory bounded for slow consumers.
+        """
+        if self.workers <= 1:
+            for t in ts:
+                yield render(float(t))
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            pending: Deque[Future[np.ndarray]] = deque()
+            for t in ts:
+                pending.append(ex.submit(render, float(t)))
+                if len(pending) >= self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
 
-        return frames_list
+    @staticmethod
+    def _cross_dissolve(img_a: np.ndarray, img_b: np.ndarray, t: float) -> np.ndarray:
+        # Blend straight from uint8: OpenCV's SIMD path avoids a float32 copy of both images
+        return cv2.addWeighted(img_a, 1.0 - t, img_b, t, 0.0)
 
     # --- Geometry helpers ---
     @staticmethod
@@ -62,79 +123,133 @@ class ClassicalMorphEngine(MorphEngine):
         return pts
 
     @staticmethod
-    def _delaunay(w: int, h: int, pts: List[Tuple[float, float]]) -> List[Tuple[int, int, int]]:
+    def _delaunay(w: int, h: int, pts: List[Tuple[float, float]]) -> np.ndarray:
+        """Return triangle vertex indices as an (N, 3) int32 array."""
         subdiv = cv2.Subdiv2D((0, 0, w, h))
         for (x, y) in pts:
             subdiv.insert((float(x), float(y)))
         triangle_list = subdiv.getTriangleList()
-        # Map each triangle vertices back to nearest point indices
-        pts_np = np.array(pts, dtype=np.float32)
+        # Subdiv2D returns the inserted coordinates verbatim, so vertices map back by exact lookup
+        pt_to_idx = {(round(x, 3), round(y, 3)): n for n, (x, y) in enumerate(pts)}
         tri_indices: List[Tuple[int, int, int]] = []
         for t in triangle_list:
-            x1, y1, x2, y2, x3, y3 = t
+            x1, y1, x2, y2, x3, y3 = (float(v) for v in t)
             # Discard triangles outside bounds
             if not (0 <= x1 < w and 0 <= y1 < h and 0 <= x2 < w and 0 <= y2 < h and 0 <= x3 < w and 0 <= y3 < h):
                 continue
-            tri = np.array([[x1, y1], [x2, y2], [x3, y3]], dtype=np.float32)
-            # Nearest neighbor index for each vertex
-            idx = []
-            for v in tri:
-                d = np.sum((pts_np - v) ** 2, axis=1)
-                idx.append(int(np.argmin(d)))
-            i, j, k = idx
+            try:
+                i, j, k = (pt_to_idx[(round(x, 3), round(y, 3))] for x, y in ((x1, y1), (x2, y2), (x3, y3)))
+            except KeyError:
+                continue
             if i != j and j != k and i != k:
                 tri_indices.append((i, j, k))
-        return tri_indices
+        return np.array(tri_indices, dtype=np.int32).reshape(-1, 3)
 
     @staticmethod
-    def _warp_by_triangles(
-        img: np.ndarray,
+    def _remap_tables(
+        w: int,
+        h: int,
         src_pts: np.ndarray,
         dst_pts: np.ndarray,
-        triangles: List[Tuple[int, int, int]],
-    ) -> np.ndarray:
-        h, w = img.shape[:2]
-        out = np.zeros_like(img)
-        for (i, j, k) in triangles:
-            t_src = np.float32([src_pts[i], src_pts[j], src_pts[k]])
-            t_dst = np.float32([dst_pts[i], dst_pts[j], dst_pts[k]])
-            ClassicalMorphEngine._warp_triangle(img, out, t_src, t_dst)
-        return out
-
-    @staticmethod
-    def _warp_triangle(src: np.ndarray, dst: np.ndarray, t_src: np.ndarray, t_dst: np.ndarray) -> None:
-        # Compute bounding rectangles
-        r_src = cv2.boundingRect(t_src)
-        r_dst = cv2.boundingRect(t_dst)
-
-        x_src, y_src, w_src, h_src = r_src
-        x_dst, y_dst, w_dst, h_dst = r_dst
-
-        # Offset triangle points by top-left corners
-        t_src_off = np.array([[t_src[0][0] - x_src, t_src[0][1] - y_src],
-                              [t_src[1][0] - x_src, t_src[1][1] - y_src],
-                              [t_src[2][0] - x_src, t_src[2][1] - y_src]], dtype=np.float32)
-        t_dst_off = np.array([[t_dst[0][0] - x_dst, t_dst[0][1] - y_dst],
-                              [t_dst[1][0] - x_dst, t_dst[1][1] - y_dst],
-                              [t_dst[2][0] - x_dst, t_dst[2][1] - y_dst]], dtype=np.float32)
-
-        # Create mask for destination triangle
-        mask = np.zeros((h_dst, w_dst, 3), dtype=np.float32)
-        cv2.fillConvexPoly(mask, np.int32(t_dst_off), (1.0, 1.0, 1.0), lineType=cv2.LINE_AA)
-
-        # Extract ROI and warp
-        roi_src = src[y_src:y_src + h_src, x_src:x_src + w_src]
-        if roi_src.size == 0:
-            return
-        M = cv2.getAffineTransform(t_src_off, t_dst_off)
-        warped = cv2.warpAffine(roi_src, M, (w_dst, h_dst), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT_101)
-
-        # Blend into destination using the mask
-        roi_dst = dst[y_dst:y_dst + h_dst, x_dst:x_dst + w_dst]
-        if roi_dst.shape[:2] != mask.shape[:2]:
-            return
-        warped = warped.astype(np.float32)
-        roi_dst = roi_dst.astype(np.float32)
-        roi_dst[:] = roi_dst * (1 - mask) + warped * mask
-        dst[y_dst:y_dst + h_dst, x_dst:x_dst + w_dst] = np.clip(roi_dst, 0, 255).astype(np.uint8)
-
+        triangles: np.ndarray,
+        parallel: bool = True,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Build cv2.remap tables for the piecewise-affine warp src_pts -> dst_pts.
+
+        Each destination triangle is rasterized into a label image; every pixel is then
+        mapped back through the inverse affine transform of the triangle covering it.
+        Pixels outside all triangles keep the identity mapping. With numba installed the
+        per-pixel pass is a JIT kernel, multi-threaded unless `parallel` is False.
+        """
+        labels = _scratch("labels", (h, w), np.int32)
+        labels.fill(-1)
+        # One inverse affine per triangle, plus a trailing identity picked up by label -1
+        inv = np.empty((len(triangles) + 1, 2, 3), dtype=np.float32)
+        inv[-1] = ((1, 0, 0), (0, 1, 0))
+        # Gather every triangle's corners in one go: (N, 3, 2) arrays instead of per-triangle lists
+        src_tri = np.ascontiguousarray(src_pts[triangles], dtype=np.float32)
+        dst_tri = np.ascontiguousarray(dst_pts[triangles], dtype=np.float32)
+        dst_tri_px = dst_tri.astype(np.int32)
+        for n in range(len(triangles)):
+            inv[n] = cv2.getAffineTransform(dst_tri[n], src_tri[n])
+            cv2.fillConvexPoly(labels, dst_tri_px[n], n, lineType=cv2.LINE_8)
+
+        map_x = np.empty((h, w), dtype=np.float32)
+        map_y = np.empty((h, w), dtype=np.float32)
+        kernel = fill_remap_maps_parallel if parallel else fill_remap_maps_serial
+        if kernel is not None:
+            kernel(labels, inv, map_x, map_y)
+            return map_x, map_y
+
+        # Evaluate map = M[label] @ (x, y, 1) in place; gathers land in a reused scratch plane
+        xs = np.arange(w, dtype=np.float32)[None, :]
+        ys = np.arange(h, dtype=np.float32)[:, None]
+        tmp = _scratch("coef", (h, w), np.float32)
+        for row, out in ((0, map_x), (1, map_y)):
+            np.take(inv[:, row, 0], labels, out=out, mode="wrap")
+            out *= xs
+            np.take(inv[:, row, 1], labels, out=tmp, mode="wrap")
+            tmp *= ys
+            out += tmp
+            np.take(inv[:, row, 2], labels, out=tmp, mode="wrap")
+            out += tmp
+        return map_x, map_y
+
+    def _warp_by_triangles(self, img: np.ndarray, map_x: np.ndarray, map_y: np.ndarray) -> np.ndarray:
+        if self._use_cuda:
+            return cv2.cuda.remap(img, map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT_101)  # type: ignore[attr-defined]
+        return cv2.remap(img, map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT_101)
+
+    def _to_device(self, arr: np.ndarray) -> np.ndarray:
+        if not self._use_cuda:
+            return arr
+        gpu = cv2.cuda_GpuMat()  # type: ignore[attr-defined]
+        gpu.upload(arr)
+        return gpu
+
+
+# Render threads for engines built without an explicit `workers`; see configure_threads()
+_default_workers: int | None = None
+
+
+def configure_threads(workers: int) -> None:
+    """Set the thread budget for morphing in this process; call once at process start.
+
+    Engines then render `workers` frames at a time, the numba kernel uses at most
+    `workers` threads, and OpenCV's own per-call threading is turned off so the
+    two pools do not multiply.
+    """
+    global _default_workers
+    _default_workers = max(1, workers)
+    cv2.setNumThreads(1)
+    limit_threads(_default_workers)
+
+
+def _cuda_available() -> bool:
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+_scratch_buffers = threading.local()
+
+
+def _scratch(name: str, shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+    """Per-thread reusable work buffer; contents are undefined on return."""
+    buf = getattr(_scratch_buffers, name, None)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype=dtype)
+        setattr(_scratch_buffers, name, buf)
+    return buf
+
+
+@lru_cache(maxsize=16)
+def _grid_and_triangles(w: int, h: int, nx: int, ny: int) -> Tuple[np.ndarray, np.ndarray]:
+    pts = ClassicalMorphEngine._grid_points(w, h, nx, ny)
+    tri_indices = ClassicalMorphEngine._delaunay(w, h, pts)
+    pts_np = np.array(pts, dtype=np.float32)
+    # Shared between callers through the cache, so guard against in-place edits
+    pts_np.flags.writeable = False
+    tri_indices.flags.writeable = False
+    return pts_np, tri_indices
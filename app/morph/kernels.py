@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import config, njit, prange, set_num_threads
+except ImportError:  # numba is optional (see the `accel` extra)
+    njit = None  # type: ignore[assignment]
+
+
+def _fill_remap_maps_parallel(labels: np.ndarray, inv: np.ndarray, map_x: np.ndarray, map_y: np.ndarray) -> None:
+    """Write map = inv[label] @ (x, y, 1) for every pixel; label -1 selects inv[-1]."""
+    h, w = labels.shape
+    last = inv.shape[0] - 1
+    for y in prange(h):
+        for x in range(w):
+            n = labels[y, x]
+            if n < 0:
+                n = last
+            map_x[y, x] = inv[n, 0, 0] * x + inv[n, 0, 1] * y + inv[n, 0, 2]
+            map_y[y, x] = inv[n, 1, 0] * x + inv[n, 1, 1] * y + inv[n, 1, 2]
+
+
+def _fill_remap_maps_serial(labels: np.ndarray, inv: np.ndarray, map_x: np.ndarray, map_y: np.ndarray) -> None:
+    """Single-threaded twin of _fill_remap_maps_parallel."""
+    h, w = labels.shape
+    last = inv.shape[0] - 1
+    for y in range(h):
+        for x in range(w):
+            n = labels[y, x]
+            if n < 0:
+                n = last
+            map_x[y, x] = inv[n, 0, 0] * x + inv[n, 0, 1] * y + inv[n, 0, 2]
+            map_y[y, x] = inv[n, 1, 0] * x + inv[n, 1, 1] * y + inv[n, 1, 2]
+
+
+if njit is not None:
+    # The serial variant is for callers already running on a worker thread: numba's default
+    # workqueue threading layer aborts on concurrent parallel launches. It must be a separate
+    # function, since numba's on-disk cache key ignores the `parallel` flag and one function
+    # compiled both ways would share a cache entry.
+    fill_remap_maps_parallel = njit(parallel=True, cache=True, fastmath=True)(_fill_remap_maps_parallel)
+    fill_remap_maps_serial = njit(cache=True, fastmath=True)(_fill_remap_maps_serial)
+else:
+    fill_remap_maps_parallel = fill_remap_maps_serial = None
+
+
+def limit_threads(n: int) -> None:
+    """Cap the threads the parallel kernel may use in this process."""
+    if njit is not None:
+        set_num_threads(min(n, config.NUMBA_NUM_THREADS))  # type: ignore[attr-defined]
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
-from typing import List
+import itertools
+import subprocess
+from typing import Iterable, Iterator, List, Tuple
 
 import cv2
-import imageio.v3 as iio
+import imageio_ffmpeg
 import numpy as np
 import logging
 
-from .base import MorphMethod, get_engine
+from .base import MorphEngine, MorphMethod, get_engine
 
 
 def build_morph_sequence(
     images: List[np.ndarray],
     frames_per_transition: int,
     method: MorphMethod = MorphMethod.classical,
-) -> List[np.ndarray]:
+) -> Iterator[np.ndarray]:
+    """Return a lazy iterator over every frame of the morph video.
+
+    Frames are produced on demand so the encoder can consume them one at a time
+    instead of holding the whole video in memory.
+    """
     if len(images) < 2:
         raise ValueError("At least two images are required")
 
@@ -23,49 +30,159 @@ def build_morph_sequence(
     norm = [cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR) if im.shape[:2] != (h, w) else im for im in images]
 
     engine = get_engine(method)
-    frames: List[np.ndarray] = []
+    return _iter_frames(norm, engine, frames_per_transition)
+
+
+def _iter_frames(norm: List[np.ndarray], engine: MorphEngine, frames_per_transition: int) -> Iterator[np.ndarray]:
     # Start with the first image as the first frame
-    frames.append(norm[0])
+    yield norm[0]
     for i in range(len(norm) - 1):
         a = norm[i]
         b = norm[i + 1]
-        inter = engine.morph_pair(a, b, frames_per_transition)
-        frames.extend(inter)
-        frames.append(b)
-    return frames
+        yield from engine.morph_pair(a, b, frames_per_transition)
+        yield b
+
+
+# Hardware H.264 encoders in order of preference, with rate control close to the libx264 default
+_HW_ENCODERS = (
+    ("h264_nvenc", ("-preset", "p4", "-rc", "vbr", "-cq", "23")),
+    ("h264_qsv", ("-global_quality", "23")),
+    ("h264_amf", ("-rc", "cqp", "-qp_i", "23", "-qp_p", "23")),
+    ("h264_videotoolbox", ("-b:v", "8M")),
+)
+
+
+# Frames held back for a retry while an encoder may still reject the stream
+_REPLAY_BYTES = 16 * 1024 * 1024
+
+# Set by select_h264_encoder() in the server, or passed to pool workers via set_h264_encoder()
+_h264_encoder: Tuple[str, Tuple[str, ...]] | None = None
+
+
+def select_h264_encoder() -> Tuple[str, Tuple[str, ...]]:
+    """Return the H.264 encoder for this host, probing for it on first use.
 
+    Probing can take seconds, so the server calls this at startup and hands the
+    result to its workers rather than letting each worker probe on its first job.
+    """
+    global _h264_encoder
+    if _h264_encoder is None:
+        _h264_encoder = _probe_h264_encoder()
+    return _h264_encoder
+
+
+def set_h264_encoder(encoder: Tuple[str, Tuple[str, ...]]) -> None:
+    global _h264_encoder
+    _h264_encoder = encoder
 
-def encode_video_mp4(frames: List[np.ndarray], fps: int, out_path: str) -> None:
-    """Encode frames as MP4.
 
-    Preferred: imageio's ffmpeg plugin (H.264, yuv420p). Fallback: OpenCV VideoWriter (mp4v).
+def _probe_h264_encoder() -> Tuple[str, Tuple[str, ...]]:
+    """Pick the first hardware H.264 encoder that works on this host, else libx264.
+
+    `ffmpeg -encoders` only says which encoders were compiled in, so each listed
+    candidate is test-encoded once.
     """
-    if not frames:
+    logger = logging.getLogger(__name__)
+    try:
+        exe = imageio_ffmpeg.get_ffmpeg_exe()
+        listed = subprocess.run([exe, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=10).stdout
+    except (RuntimeError, OSError, subprocess.SubprocessError):
+        return "libx264", ()
+    for codec, params in _HW_ENCODERS:
+        if f" {codec} " not in listed:
+            continue
+        probe = [
+            exe, "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", "color=size=256x256", "-frames:v", "1",
+            "-pix_fmt", "yuv420p", "-c:v", codec, *params, "-f", "null", "-",
+        ]
+        try:
+            if subprocess.run(probe, capture_output=True, timeout=10).returncode == 0:
+                logger.info("video_encoder_selected", extra={"codec": codec})
+                return codec, params
+        except (OSError, subprocess.SubprocessError):
+            continue
+    return "libx264", ()
+
+
+def encode_video_mp4(frames: Iterable[np.ndarray], fps: int, out_path: str) -> None:
+    """Encode frames as MP4, streaming them to the encoder one at a time.
+
+    Preferred: ffmpeg via imageio-ffmpeg (H.264, yuv420p), using a hardware encoder (NVENC, Quick Sync,
+    AMF, VideoToolbox) when one works on this host and libx264 otherwise. A hardware encoder that
+    rejects the job (e.g. an unsupported frame size) is retried with libx264. Frames are piped as raw
+    bgr24, so no colour conversion or copy happens in Python. Fallback: OpenCV VideoWriter (mp4v),
+    only taken if every ffmpeg encoder fails at startup.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
         raise ValueError("No frames to encode")
     logger = logging.getLogger(__name__)
+    h, w = first.shape[:2]
     # Try ffmpeg (H.264)
-    try:
-        frames_rgb = [cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in frames]
-        iio.imwrite(
-            out_path,
-            frames_rgb,
-            plugin="ffmpeg",
-            fps=fps,
-            codec="libx264",
-            output_params=["-pix_fmt", "yuv420p"],
-        )
-        return
-    except Exception as e:
-        logger.warning("imageio_ffmpeg_unavailable_fallback_cv2", extra={"error": str(e)})
+    candidates = [select_h264_encoder()]
+    if candidates[0][0] != "libx264":
+        candidates.append(("libx264", ()))
+    # ffmpeg opens the encoder only once it has read the first frame, so a rejected encoder
+    # surfaces a few sends later. Frames sent so far are kept to replay into the next attempt.
+    replay: List[np.ndarray] | None = [first]
+    replay_bytes = first.nbytes
+    for codec, params in candidates:
+        writer = None
+        error: Exception | None = None
+        try:
+            writer = imageio_ffmpeg.write_frames(
+                out_path,
+                (w, h),
+                pix_fmt_in="bgr24",
+                pix_fmt_out="yuv420p",
+                fps=fps,
+                codec=codec,
+                # imageio-ffmpeg maps quality to libx264's -crf; hardware encoders get their own rate control
+                quality=5 if codec == "libx264" else None,
+                output_params=list(params),
+            )
+            writer.send(None)
+            for f in replay:
+                writer.send(np.ascontiguousarray(f))
+        except Exception as e:
+            error = e
+        while error is None:
+            # Only encoder errors lead to a retry; an error from the frame source propagates
+            try:
+                f = next(frames, None)
+            except BaseException:
+                writer.close()
+                raise
+            if f is None:
+                writer.close()
+                return
+            if replay is not None:
+                if len(replay) < 2 or replay_bytes < _REPLAY_BYTES:
+                    replay.append(f)
+                    replay_bytes += f.nbytes
+                else:
+                    replay = None
+            try:
+                writer.send(np.ascontiguousarray(f))
+            except Exception as e:
+                error = e
+        if writer is not None:
+            writer.close()
+        if replay is None:
+            # Failed mid-stream: the frames already sent cannot be encoded again
+            raise error
+        logger.warning("ffmpeg_encoder_failed", extra={"codec": codec, "error": str(error)})
 
     # Fallback to OpenCV VideoWriter (mp4v)
-    h, w = frames[0].shape[:2]
+    logger.warning("imageio_ffmpeg_unavailable_fallback_cv2")
     fourcc = cv2.VideoWriter_fourcc(*"mp4v")
     writer = cv2.VideoWriter(out_path, fourcc, fps, (w, h))
     if not writer.isOpened():
         raise RuntimeError("Failed to open VideoWriter for output MP4")
     try:
-        for f in frames:
+        for f in itertools.chain(replay, frames):
             if f.shape[:2] != (h, w):
                 f = cv2.resize(f, (w, h), interpolation=cv2.INTER_LINEAR)
             writer.write(f)
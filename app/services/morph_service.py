@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import logging
-from typing import List
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
 
 import numpy as np
 
 from app.core.config import settings
+from app.core.logging import setup_logging
 from app.morph.base import MorphMethod
-from app.morph.pipeline import build_morph_sequence, encode_video_mp4
+from app.morph.classical_morph import configure_threads
+from app.morph.pipeline import build_morph_sequence, encode_video_mp4, select_h264_encoder, set_h264_encoder
 from .storage_service import StorageService, JobPaths
 
 logger = logging.getLogger(__name__)
@@ -19,16 +25,13 @@ class MorphService:
 
     def process_job(
         self,
-        files_data: List[bytes],
-        filenames: List[str],
+        job: JobPaths,
+        input_paths: List[Path],
         frames_per_transition: int,
         fps: int,
         method: MorphMethod,
     ) -> JobPaths:
-        job = self.storage.create_job()
-        logger.info("job_created", extra={"job_id": job.job_id})
-        saved_paths = self.storage.save_uploads(job, zip(filenames, files_data))
-        images = self.storage.load_images(saved_paths)
+        images = self.storage.load_images(input_paths)
 
         frames = build_morph_sequence(images, frames_per_transition, method)
         encode_video_mp4(frames, fps, str(job.output_video))
@@ -38,10 +41,37 @@ class MorphService:
             "frames_per_transition": frames_per_transition,
             "fps": fps,
             "method": method.value,
-            "input_images": [str(p) for p in saved_paths],
+            "input_images": [str(p) for p in input_paths],
             "output_video": str(job.output_video),
         }
         self.storage.write_meta(job, meta)
         logger.info("job_completed", extra={"job_id": job.job_id, "output": str(job.output_video)})
         return job
 
+
+def create_morph_pool() -> ProcessPoolExecutor:
+    """Create the process pool that runs morph jobs.
+
+    Workers start from a forkserver rather than fork(): the server is already
+    multi-threaded when the pool spawns them, and forking a threaded process can
+    copy locks held by other threads. There are `settings.morph_workers` workers and
+    the cores are split between them, so each job renders frames on its share of
+    threads without concurrent jobs oversubscribing the machine. The H.264
+    encoder is probed here, once, and passed to every worker.
+    """
+    cpus = os.cpu_count() or 1
+    workers = settings.morph_workers
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(max(1, cpus // workers), select_h264_encoder()),
+    )
+
+
+def _init_worker(render_threads: int, encoder: Tuple[str, Tuple[str, ...]]) -> None:
+    # Workers are fresh interpreters and do not inherit the server's logging setup
+    setup_logging()
+    configure_threads(render_threads)
+    set_h264_encoder(encoder)
+
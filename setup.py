@@ -0,0 +1,24 @@
+"""Optional native build of the classical morph engine.
+
+Regular installs are pure Python. With mypy available, set PIC2VIDEO_MYPYC=1 to
+compile app/morph/classical_morph.py with mypyc:
+
+    pip install mypy
+    PIC2VIDEO_MYPYC=1 pip install --no-build-isolation .
+"""
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.getenv("PIC2VIDEO_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    # app/ has no __init__.py files, so mypy needs namespace-package resolution
+    ext_modules = mypycify([
+        "--explicit-package-bases",
+        "--namespace-packages",
+        "app/morph/classical_morph.py",
+    ])
+
+setup(ext_modules=ext_modules)